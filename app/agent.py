@@ -9,15 +9,72 @@ Implements an agentic pattern with:
 
 import os
 import json
-from typing import Optional
+import asyncio
+import hashlib
+from functools import lru_cache
+from io import StringIO
+from typing import Iterator, Optional, TextIO
 
 # Load .env file automatically (override=True to prioritize .env over system env vars)
 from dotenv import load_dotenv
 load_dotenv(override=True)
 
-from openai import OpenAI
+import tiktoken
+from openai import AsyncOpenAI
 
-from app.tools_wikipedia import wikipedia_search, wikipedia_summary
+from app import cache
+from app.tools_wikipedia import wikipedia_search_async, wikipedia_summaries_bulk
+
+
+# Prompt templates (built once at import, shared by every call)
+_SYSTEM_PROMPT = """You are a research assistant that creates comprehensive, well-structured reports.
+
+Your reports should:
+- Be written in Markdown format
+- Have a clear title and structure with headers
+- Synthesize information from Wikipedia sources
+- Include relevant citations and references
+- Be informative and well-organized
+
+Always cite your sources using the Wikipedia article titles provided."""
+
+# Shared system message for the report call (never mutated; the OpenAI SDK
+# only reads it, so it's reused as-is instead of rebuilt per call)
+_SYSTEM_MSG = {"role": "system", "content": _SYSTEM_PROMPT}
+
+_INSTRUCTIONS = "## Instructions\nPlease create a comprehensive research report based on the above information. Include a title, introduction, main content with sections, and a references section listing the Wikipedia articles used."
+
+_SUMMARY_SYSTEM_PROMPT = "You are a helpful assistant that creates concise summaries. Extract the key points and main ideas from the provided text."
+
+_TOPIC_SYSTEM_PROMPT = "Extract the main topic or subject for a Wikipedia search from the user's question. Respond with just the search query, nothing else."
+
+# Rough characters per token, used when no tokenizer could be loaded
+CHARS_PER_TOKEN = 4
+
+
+@lru_cache(maxsize=None)
+def _load_encoding(model: str) -> Optional[tiktoken.Encoding]:
+    """
+    Load the tokenizer for the model, once per process.
+    
+    tiktoken downloads the BPE file on first use (unless TIKTOKEN_CACHE_DIR
+    holds it), so this can fail offline; callers then fall back to a
+    character-based estimate.
+    
+    Args:
+        model: OpenAI model name
+    
+    Returns:
+        The encoding, or None if it could not be loaded
+    """
+    try:
+        try:
+            return tiktoken.encoding_for_model(model)
+        except KeyError:
+            return tiktoken.get_encoding("o200k_base")
+    except Exception as e:
+        print(f"  Tokenizer unavailable ({e}), estimating tokens from characters")
+        return None
 
 
 class ResearchAgent:
@@ -25,65 +82,194 @@ class ResearchAgent:
     LLM-powered research agent that uses Wikipedia for information gathering.
     """
     
-    # Chunk size for large context handling
-    CHUNK_SIZE = 12000
+    # Chunk size for large context handling (tokens per summarization call)
+    CHUNK_TOKEN_BUDGET = 4000
+    # Upper bound on characters per chunk searched for the token boundary
+    MAX_CHUNK_CHARS = CHUNK_TOKEN_BUDGET * 8
     MAX_CONTEXT_DIRECT = 15000
+    # Merged summaries above this many tokens are reduced pairwise, at most
+    # MAX_REDUCE_LEVELS times, to bound the size of the final prompt
+    MAX_MERGED_TOKENS = MAX_CONTEXT_DIRECT // 2
+    MAX_REDUCE_LEVELS = 4
+    # Maximum concurrent summarization calls (keeps us under OpenAI RPM limits)
+    MAX_CONCURRENT_SUMMARIES = 8
+    # Prompts up to this many words are first tried as the Wikipedia query as-is
+    MAX_DIRECT_QUERY_WORDS = 8
     
     def __init__(self):
         """Initialize the agent with OpenAI client."""
-        self.client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+        self.client = AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"))
         self.model = os.getenv("OPENAI_MODEL", "gpt-4o-mini")
         self.sources = []
     
-    def _chunk_text(self, text: str) -> list[str]:
-        """Split large text into chunks for processing."""
-        chunks = []
-        words = text.split()
-        current_chunk = []
-        current_length = 0
-        
-        for word in words:
-            word_len = len(word) + 1  # +1 for space
-            if current_length + word_len > self.CHUNK_SIZE:
-                chunks.append(" ".join(current_chunk))
-                current_chunk = [word]
-                current_length = word_len
-            else:
-                current_chunk.append(word)
-                current_length += word_len
+    @property
+    def encoding(self) -> Optional[tiktoken.Encoding]:
+        """Tokenizer for the model, loaded on first use (only large contexts need it)."""
+        return _load_encoding(self.model)
+    
+    async def _embed_prompt(self, prompt: str) -> Optional[list[float]]:
+        """Embed the prompt for the semantic cache (None if embedding fails)."""
+        if not cache.CACHE_ENABLED:
+            return None
+        try:
+            response = await self.client.embeddings.create(
+                model=cache.EMBEDDING_MODEL,
+                input=prompt
+            )
+            return response.data[0].embedding
+        except Exception as e:
+            print(f"  Prompt embedding error: {e}")
+            return None
+    
+    def _count_tokens(self, text: str) -> int:
+        """Count tokens the way the model will (special tokens treated as text)."""
+        encoding = self.encoding
+        if encoding is None:
+            return -(-len(text) // CHARS_PER_TOKEN)
+        return len(encoding.encode(text, disallowed_special=()))
+    
+    def _chunk_end(self, text: str, start: int) -> int:
+        """
+        Find where the chunk starting at `start` should end.
         
-        if current_chunk:
-            chunks.append(" ".join(current_chunk))
+        Encodes the window of at most MAX_CHUNK_CHARS characters once and
+        cuts it after its first CHUNK_TOKEN_BUDGET tokens.
+        """
+        encoding = self.encoding
+        if encoding is None:
+            return min(start + self.CHUNK_TOKEN_BUDGET * CHARS_PER_TOKEN, len(text))
+        
+        hi = min(start + self.MAX_CHUNK_CHARS, len(text))
+        tokens = encoding.encode(text[start:hi], disallowed_special=())
+        if len(tokens) <= self.CHUNK_TOKEN_BUDGET:
+            return hi
+        
+        # Characters covered by the budget tokens (a character split across
+        # the boundary token is left for the next chunk)
+        covered = encoding.decode_bytes(tokens[:self.CHUNK_TOKEN_BUDGET])
+        return start + max(len(covered.decode("utf-8", errors="ignore")), 1)
+    
+    def _chunk_text(self, text: str) -> Iterator[str]:
+        """
+        Lazily split large text into chunks for processing.
         
-        return chunks
+        Each chunk is the longest slice fitting CHUNK_TOKEN_BUDGET tokens,
+        backed off to the last whitespace before the boundary, so no
+        per-word list is built.
+        """
+        start = 0
+        length = len(text)
+        
+        while start < length:
+            # Skip the whitespace left over from the previous boundary
+            while start < length and text[start].isspace():
+                start += 1
+            if start == length:
+                break
+            end = self._chunk_end(text, start)
+            if end < length:
+                split_at = max(text.rfind(" ", start, end), text.rfind("\n", start, end))
+                if split_at > start:
+                    end = split_at
+            
+            chunk = text[start:end].rstrip()
+            if chunk:
+                yield chunk
+            start = end
     
-    def _summarize_chunk(self, chunk: str, chunk_index: int, total_chunks: int) -> str:
-        """Summarize a single chunk of text."""
-        print(f"  Summarizing chunk {chunk_index + 1}/{total_chunks}...")
+    @staticmethod
+    def _dedupe(texts) -> tuple[list[bytes], dict[bytes, str]]:
+        """
+        Deduplicate texts by content digest.
         
-        response = self.client.chat.completions.create(
-            model=self.model,
-            messages=[
-                {
-                    "role": "system",
-                    "content": "You are a helpful assistant that creates concise summaries. Extract the key points and main ideas from the provided text."
-                },
-                {
-                    "role": "user",
-                    "content": f"Please summarize the following text, preserving the most important information:\n\n{chunk}"
-                }
-            ],
-            max_tokens=1000
-        )
+        Returns:
+            The digest of every text in order, and the distinct texts by digest
+        """
+        digests = []
+        unique = {}
+        for text in texts:
+            digest = hashlib.blake2b(text.encode("utf-8")).digest()
+            digests.append(digest)
+            unique.setdefault(digest, text)
+        return digests, unique
+    
+    def _unique_chunks(self, text: str) -> tuple[list[bytes], dict[bytes, str]]:
+        """
+        Chunk the text, deduplicating repeated chunks (boilerplate, repeated
+        sections) so each distinct chunk is only summarized once.
+        
+        Returns:
+            The digest of every chunk in order, and the distinct chunks by digest
+        """
+        return self._dedupe(self._chunk_text(text))
+    
+    async def _summarize_chunk(
+        self,
+        chunk: str,
+        chunk_index: int,
+        total_chunks: int,
+        semaphore: asyncio.Semaphore
+    ) -> str:
+        """Summarize a single chunk of text and cache it by chunk content."""
+        async with semaphore:
+            print(f"  Summarizing chunk {chunk_index + 1}/{total_chunks}...")
+            response = await self.client.chat.completions.create(
+                model=self.model,
+                messages=[
+                    {
+                        "role": "system",
+                        "content": _SUMMARY_SYSTEM_PROMPT
+                    },
+                    {
+                        "role": "user",
+                        "content": f"Please summarize the following text, preserving the most important information:\n\n{chunk}"
+                    }
+                ],
+                max_tokens=1000
+            )
+        
+        summary = response.choices[0].message.content
+        await cache.set_cached_async(cache.summary_key(chunk), summary)
+        return summary
+    
+    async def _summarize_chunks(self, chunks: list[str], semaphore: asyncio.Semaphore) -> list[str]:
+        """
+        Summarize chunks concurrently (gather preserves order).
         
-        return response.choices[0].message.content
+        All chunks are looked up in the summary cache with a single MGET
+        first; only the misses are sent to the LLM.
+        """
+        summaries = await cache.get_cached_many_async([cache.summary_key(chunk) for chunk in chunks])
+        missing = [i for i, summary in enumerate(summaries) if summary is None]
+        if len(missing) < len(chunks):
+            print(f"  {len(chunks) - len(missing)}/{len(chunks)} chunk summaries served from cache")
+        
+        results = await asyncio.gather(*(
+            self._summarize_chunk(chunks[i], i, len(chunks), semaphore)
+            for i in missing
+        ))
+        for i, summary in zip(missing, results):
+            summaries[i] = summary
+        return summaries
+    
+    async def _summarize_unique(
+        self,
+        digests: list[bytes],
+        unique: dict[bytes, str],
+        semaphore: asyncio.Semaphore
+    ) -> list[str]:
+        """Summarize the distinct texts of a _dedupe result, returned in the original order."""
+        unique_summaries = await self._summarize_chunks(list(unique.values()), semaphore)
+        summary_by_digest = dict(zip(unique.keys(), unique_summaries))
+        return [summary_by_digest[d] for d in digests]
     
-    def _handle_large_context(self, context_text: str) -> str:
+    async def _handle_large_context(self, context_text: str) -> str:
         """
         Handle large context via chunking and summarization.
         
         If context is larger than MAX_CONTEXT_DIRECT, split into chunks,
-        summarize each, and merge the summaries.
+        summarize them concurrently, reduce the summaries pairwise while
+        they exceed MAX_MERGED_TOKENS, and merge the result.
         """
         if len(context_text) <= self.MAX_CONTEXT_DIRECT:
             print(f"  Context size ({len(context_text)} chars) within limit, using directly")
@@ -91,15 +277,39 @@ class ResearchAgent:
         
         print(f"  Context size ({len(context_text)} chars) exceeds limit, chunking and summarizing...")
         
-        # Chunk the text
-        chunks = self._chunk_text(context_text)
-        print(f"  Split into {len(chunks)} chunks")
-        
-        # Summarize each chunk
-        summaries = []
-        for i, chunk in enumerate(chunks):
-            summary = self._summarize_chunk(chunk, i, len(chunks))
-            summaries.append(summary)
+        # Tokenizing multi-MB contexts takes a while, so it runs in a thread
+        # and the Wikipedia task keeps making progress on the loop
+        digests, unique = await asyncio.to_thread(self._unique_chunks, context_text)
+        print(f"  Split into {len(digests)} chunks")
+        if len(unique) < len(digests):
+            print(f"  {len(unique)} unique chunks ({len(digests) - len(unique)} duplicates skipped)")
+        
+        # Summarize all unique chunks concurrently
+        semaphore = asyncio.Semaphore(self.MAX_CONCURRENT_SUMMARIES)
+        summaries = await self._summarize_unique(digests, unique, semaphore)
+        
+        # Tree reduction: summarize adjacent pairs of summaries (each level in
+        # parallel) until the merged result fits the token budget
+        level = 0
+        while (
+            len(summaries) > 1
+            and level < self.MAX_REDUCE_LEVELS
+            and sum(self._count_tokens(s) for s in summaries) > self.MAX_MERGED_TOKENS
+        ):
+            level += 1
+            print(f"  Reduction level {level}: merging {len(summaries)} summaries pairwise...")
+            # Repeated chunks give repeated pairs, summarized only once too
+            pair_digests, unique_pairs = self._dedupe(
+                f"{summaries[i]}\n\n{summaries[i + 1]}"
+                for i in range(0, len(summaries) - 1, 2)
+            )
+            if len(unique_pairs) < len(pair_digests):
+                print(f"  {len(unique_pairs)} unique pairs ({len(pair_digests) - len(unique_pairs)} duplicates skipped)")
+            reduced = await self._summarize_unique(pair_digests, unique_pairs, semaphore)
+            # An odd summary out is carried up to the next level unchanged
+            if len(summaries) % 2:
+                reduced.append(summaries[-1])
+            summaries = reduced
         
         # Merge summaries
         merged = "\n\n---\n\n".join([
@@ -110,28 +320,24 @@ class ResearchAgent:
         print(f"  Merged summaries: {len(merged)} chars")
         return merged
     
-    def _gather_wikipedia_info(self, prompt: str) -> dict:
+    async def _extract_topic(self, prompt: str) -> str:
         """
-        Use Wikipedia tools to gather information relevant to the prompt.
+        Get the Wikipedia search query for a prompt from the LLM.
         
-        Implements an agentic pattern:
-        1. Search Wikipedia for the topic
-        2. Get summaries of top results
-        3. Return gathered information
+        Results are cached by exact prompt so repeats skip the call.
         """
-        print("  Gathering Wikipedia information...")
-        gathered = {
-            "searches": [],
-            "summaries": []
-        }
+        cache_key = cache.topic_key(prompt)
+        cached = await cache.get_cached_async(cache_key)
+        if cached is not None:
+            return cached
         
         # Extract key topic from prompt using LLM
-        topic_response = self.client.chat.completions.create(
+        topic_response = await self.client.chat.completions.create(
             model=self.model,
             messages=[
                 {
                     "role": "system",
-                    "content": "Extract the main topic or subject for a Wikipedia search from the user's question. Respond with just the search query, nothing else."
+                    "content": _TOPIC_SYSTEM_PROMPT
                 },
                 {
                     "role": "user",
@@ -141,10 +347,48 @@ class ResearchAgent:
             max_tokens=50
         )
         search_query = topic_response.choices[0].message.content.strip()
-        print(f"  Extracted search query: {search_query}")
+        await cache.set_cached_async(cache_key, search_query)
+        return search_query
+    
+    async def _search_wikipedia(self, prompt: str) -> tuple[str, list[str]]:
+        """
+        Search Wikipedia for the prompt's topic.
+        
+        Short prompts are searched as-is first (opensearch matches title
+        prefixes, so this finds e.g. "Quantum computing"); when that finds
+        nothing, or the prompt is long, the query is extracted by the LLM.
+        
+        Returns:
+            The search query used and the matching article titles
+        """
+        prompt = prompt.strip()
+        if len(prompt.split()) <= self.MAX_DIRECT_QUERY_WORDS:
+            search_results = await wikipedia_search_async(prompt, limit=5)
+            if search_results:
+                return prompt, search_results
+        
+        search_query = await self._extract_topic(prompt)
+        return search_query, await wikipedia_search_async(search_query, limit=5)
+    
+    async def _gather_wikipedia_info(self, prompt: str) -> dict:
+        """
+        Use Wikipedia tools to gather information relevant to the prompt.
+        
+        Implements an agentic pattern:
+        1. Search Wikipedia for the topic
+        2. Get summaries of top results
+        3. Return gathered information
+        """
+        print("  Gathering Wikipedia information...")
+        gathered = {
+            "searches": [],
+            "summaries": []
+        }
         
         # Search Wikipedia
-        search_results = wikipedia_search(search_query, limit=5)
+        search_query, search_results = await self._search_wikipedia(prompt)
+        print(f"  Search query: {search_query}")
+        
         gathered["searches"].append({
             "query": search_query,
             "results": search_results
@@ -158,9 +402,11 @@ class ResearchAgent:
         # Get summaries for top results (up to 3)
         titles_to_summarize = search_results[:3] if search_results else []
         
-        for title in titles_to_summarize:
-            print(f"  Getting summary for: {title}")
-            summary = wikipedia_summary(title)
+        if titles_to_summarize:
+            print(f"  Getting summaries for: {', '.join(titles_to_summarize)}")
+        summaries = await wikipedia_summaries_bulk(titles_to_summarize)
+        
+        for title, summary in summaries.items():
             if summary:
                 gathered["summaries"].append({
                     "title": title,
@@ -182,21 +428,6 @@ class ResearchAgent:
         wiki_info: dict
     ) -> list:
         """Build the message list for the final LLM call."""
-        
-        # System message
-        system_content = """You are a research assistant that creates comprehensive, well-structured reports.
-
-Your reports should:
-- Be written in Markdown format
-- Have a clear title and structure with headers
-- Synthesize information from Wikipedia sources
-- Include relevant citations and references
-- Be informative and well-organized
-
-Always cite your sources using the Wikipedia article titles provided."""
-
-        messages = [{"role": "system", "content": system_content}]
-        
         # Build user message content
         user_content = []
         
@@ -207,35 +438,41 @@ Always cite your sources using the Wikipedia article titles provided."""
                 "image_url": {"url": image_data}
             })
         
-        # Build text content
-        text_parts = [f"## Research Request\n{prompt}"]
+        # Build text content in a single buffer
+        text = StringIO()
+        text.write("## Research Request\n")
+        text.write(prompt)
         
         # Add processed context if available
         if processed_context:
-            text_parts.append(f"\n## Provided Context\n{processed_context}")
+            text.write("\n\n## Provided Context\n")
+            text.write(processed_context)
         
         # Add Wikipedia information
         if wiki_info["summaries"]:
-            text_parts.append("\n## Wikipedia Sources")
+            text.write("\n\n## Wikipedia Sources")
             for item in wiki_info["summaries"]:
-                text_parts.append(f"\n### {item['title']}\n{item['summary']}")
+                text.write("\n\n### ")
+                text.write(item["title"])
+                text.write("\n")
+                text.write(item["summary"])
         
-        text_parts.append("\n## Instructions\nPlease create a comprehensive research report based on the above information. Include a title, introduction, main content with sections, and a references section listing the Wikipedia articles used.")
+        text.write("\n\n")
+        text.write(_INSTRUCTIONS)
         
         user_content.append({
             "type": "text",
-            "text": "\n".join(text_parts)
+            "text": text.getvalue()
         })
         
-        messages.append({"role": "user", "content": user_content})
-        
-        return messages
+        return [_SYSTEM_MSG, {"role": "user", "content": user_content}]
     
-    def research(
+    async def research(
         self,
         prompt: str,
         image_data: Optional[str] = None,
-        context_text: Optional[str] = None
+        context_text: Optional[str] = None,
+        report_file: Optional[TextIO] = None
     ) -> dict:
         """
         Execute the research workflow.
@@ -244,6 +481,8 @@ Always cite your sources using the Wikipedia article titles provided."""
             prompt: The research question or topic
             image_data: Optional base64 data URL of an image
             context_text: Optional large text context
+            report_file: Optional text file the report is streamed into
+                as it is generated
         
         Returns:
             Dictionary with 'report' and 'sources'
@@ -251,33 +490,71 @@ Always cite your sources using the Wikipedia article titles provided."""
         print("Starting research workflow...")
         self.sources = []
         
-        # Step 1: Handle large context if provided
-        processed_context = None
-        if context_text:
-            print("Step 1: Processing context text...")
-            processed_context = self._handle_large_context(context_text)
-        else:
-            print("Step 1: No context text provided, skipping...")
-        
-        # Step 2: Gather Wikipedia information
-        print("Step 2: Gathering external data from Wikipedia...")
-        wiki_info = self._gather_wikipedia_info(prompt)
+        # Step 0: Return a cached result for a semantically similar prompt
+        # (only among jobs with the same image and context inputs)
+        scope = cache.input_scope(image_data, context_text)
+        embedding = await self._embed_prompt(prompt)
+        if embedding is not None:
+            cached = await cache.semantic_lookup_async(embedding, scope)
+            if cached is not None:
+                if report_file is not None:
+                    report_file.write(cached["report"])
+                print("Research workflow completed (from cache)!")
+                return cached
+        
+        # Steps 1 and 2 share no data, so gather Wikipedia information in the
+        # background while the (potentially long) context summarization runs
+        print("Step 2: Gathering external data from Wikipedia (in background)...")
+        wiki_task = asyncio.create_task(self._gather_wikipedia_info(prompt))
+        try:
+            # Step 1: Handle large context if provided
+            processed_context = None
+            if context_text:
+                print("Step 1: Processing context text...")
+                processed_context = await self._handle_large_context(context_text)
+            else:
+                print("Step 1: No context text provided, skipping...")
+            
+            wiki_info = await wiki_task
+        finally:
+            # Don't leave the Wikipedia task running if summarization failed
+            wiki_task.cancel()
         
         # Step 3: Generate the report
         print("Step 3: Generating research report...")
         messages = self._build_messages(prompt, image_data, processed_context, wiki_info)
         
-        response = self.client.chat.completions.create(
+        stream = await self.client.chat.completions.create(
             model=self.model,
             messages=messages,
-            max_tokens=4000
+            max_tokens=4000,
+            stream=True
         )
         
-        report = response.choices[0].message.content
+        # Write the report out as tokens arrive instead of waiting for the
+        # full completion
+        report_parts = []
+        async for chunk in stream:
+            if not chunk.choices:
+                continue
+            delta = chunk.choices[0].delta.content
+            if not delta:
+                continue
+            report_parts.append(delta)
+            if report_file is not None:
+                report_file.write(delta)
+                if "\n" in delta:
+                    report_file.flush()
+        
+        report = "".join(report_parts)
         print("Research workflow completed!")
         
-        return {
+        result = {
             "report": report,
             "sources": self.sources
         }
+        if embedding is not None:
+            await cache.semantic_store_async(embedding, scope, prompt, result)
+        
+        return result
 
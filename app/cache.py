@@ -0,0 +1,261 @@
+"""
+Redis-backed caches for the research agent.
+
+Provides:
+- Exact-match cache for chunk summaries (sum:*) and Wikipedia tool calls (wiki:*)
+- Exact-match cache for prompt -> Wikipedia search query extraction (topic:*)
+- Semantic cache for full research results, keyed by prompt embedding (sem:*)
+
+All cache operations fail open: if Redis is unavailable (or too slow to
+answer within CACHE_SOCKET_TIMEOUT), lookups miss and writes are skipped,
+so the agent keeps working without a cache. Code running on an event loop
+uses the *_async variants, which run the Redis calls in a thread.
+"""
+
+import os
+import json
+import asyncio
+import hashlib
+from array import array
+from typing import Optional
+
+from app.queue import get_redis_connection
+
+# Configuration
+CACHE_ENABLED = os.getenv("CACHE_ENABLED", "true").lower() == "true"
+CACHE_TTL_SECONDS = int(os.getenv("CACHE_TTL_SECONDS", str(7 * 24 * 3600)))  # 7 days
+SEMANTIC_CACHE_THRESHOLD = float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.92"))
+# Seconds to wait for Redis to connect or answer before a lookup misses
+CACHE_SOCKET_TIMEOUT = float(os.getenv("CACHE_SOCKET_TIMEOUT", "0.5"))
+EMBEDDING_MODEL = "text-embedding-3-small"
+
+# Number of most recent semantic entries compared on lookup
+SEMANTIC_MAX_ENTRIES = 500
+SEMANTIC_INDEX_KEY = "sem:index"
+
+_redis_conn = None
+
+
+def _get_redis():
+    """Get (and reuse) the Redis connection used for caching."""
+    global _redis_conn
+    if _redis_conn is None:
+        _redis_conn = get_redis_connection(
+            socket_timeout=CACHE_SOCKET_TIMEOUT,
+            socket_connect_timeout=CACHE_SOCKET_TIMEOUT
+        )
+    return _redis_conn
+
+
+def summary_key(chunk: str) -> str:
+    """Cache key for a chunk summary (exact match on chunk content)."""
+    return f"sum:{hashlib.blake2b(chunk.encode('utf-8')).hexdigest()}"
+
+
+def wiki_key(tool: str, *args) -> str:
+    """Cache key for a Wikipedia tool call (exact match on tool + arguments)."""
+    raw = json.dumps([tool, *args], ensure_ascii=False)
+    return f"wiki:{hashlib.sha1(raw.encode('utf-8')).hexdigest()}"
+
+
+def topic_key(prompt: str) -> str:
+    """Cache key for the search query extracted from a prompt."""
+    return f"topic:{hashlib.sha1(prompt.encode('utf-8')).hexdigest()}"
+
+
+def input_scope(*inputs: Optional[str]) -> str:
+    """Digest of optional job inputs, used to partition the semantic cache."""
+    h = hashlib.blake2b(digest_size=16)
+    for value in inputs:
+        h.update(b"\x00" if value is None else b"\x01" + value.encode("utf-8"))
+        h.update(b"\xff")
+    return h.hexdigest()
+
+
+def get_cached(key: str) -> Optional[str]:
+    """Get a cached string value, or None on miss."""
+    if not CACHE_ENABLED:
+        return None
+    try:
+        value = _get_redis().get(key)
+        return value.decode("utf-8") if value is not None else None
+    except Exception as e:
+        print(f"Cache read error: {e}")
+        return None
+
+
+def set_cached(key: str, value: str) -> None:
+    """Store a string value with the cache TTL."""
+    if not CACHE_ENABLED:
+        return
+    try:
+        _get_redis().set(key, value.encode("utf-8"), ex=CACHE_TTL_SECONDS)
+    except Exception as e:
+        print(f"Cache write error: {e}")
+
+
+def get_cached_many(keys: list[str]) -> list[Optional[str]]:
+    """Get several cached string values in one round trip (None for each miss)."""
+    if not CACHE_ENABLED or not keys:
+        return [None] * len(keys)
+    try:
+        values = _get_redis().mget(keys)
+        return [value.decode("utf-8") if value is not None else None for value in values]
+    except Exception as e:
+        print(f"Cache read error: {e}")
+        return [None] * len(keys)
+
+
+def set_cached_many(items: dict[str, str]) -> None:
+    """Store several string values with the cache TTL in one round trip."""
+    if not CACHE_ENABLED or not items:
+        return
+    try:
+        pipe = _get_redis().pipeline(transaction=False)
+        for key, value in items.items():
+            pipe.set(key, value.encode("utf-8"), ex=CACHE_TTL_SECONDS)
+        pipe.execute()
+    except Exception as e:
+        print(f"Cache write error: {e}")
+
+
+def get_cached_json(key: str):
+    """Get a cached JSON value, or None on miss."""
+    value = get_cached(key)
+    return json.loads(value) if value is not None else None
+
+
+def set_cached_json(key: str, value) -> None:
+    """Store a JSON-serializable value with the cache TTL."""
+    set_cached(key, json.dumps(value, ensure_ascii=False))
+
+
+def get_cached_json_many(keys: list[str]) -> list:
+    """Get several cached JSON values in one round trip (None for each miss)."""
+    return [json.loads(value) if value is not None else None for value in get_cached_many(keys)]
+
+
+def set_cached_json_many(items: dict) -> None:
+    """Store several JSON-serializable values with the cache TTL in one round trip."""
+    set_cached_many({key: json.dumps(value, ensure_ascii=False) for key, value in items.items()})
+
+
+async def get_cached_async(key: str) -> Optional[str]:
+    """get_cached without blocking the event loop."""
+    return await asyncio.to_thread(get_cached, key)
+
+
+async def set_cached_async(key: str, value: str) -> None:
+    """set_cached without blocking the event loop."""
+    await asyncio.to_thread(set_cached, key, value)
+
+
+async def get_cached_many_async(keys: list[str]) -> list[Optional[str]]:
+    """get_cached_many without blocking the event loop."""
+    return await asyncio.to_thread(get_cached_many, keys)
+
+
+async def get_cached_json_async(key: str):
+    """get_cached_json without blocking the event loop."""
+    return await asyncio.to_thread(get_cached_json, key)
+
+
+async def set_cached_json_async(key: str, value) -> None:
+    """set_cached_json without blocking the event loop."""
+    await asyncio.to_thread(set_cached_json, key, value)
+
+
+async def get_cached_json_many_async(keys: list[str]) -> list:
+    """get_cached_json_many without blocking the event loop."""
+    return await asyncio.to_thread(get_cached_json_many, keys)
+
+
+async def set_cached_json_many_async(items: dict) -> None:
+    """set_cached_json_many without blocking the event loop."""
+    await asyncio.to_thread(set_cached_json_many, items)
+
+
+def _dot(a: array, b: array) -> float:
+    """Dot product of two vectors (cosine similarity for unit vectors)."""
+    return sum(x * y for x, y in zip(a, b))
+
+
+def semantic_lookup(embedding: list[float], scope: str) -> Optional[dict]:
+    """
+    Find a cached research result whose prompt embedding is similar enough.
+
+    Args:
+        embedding: Normalized embedding of the prompt
+        scope: Digest of the non-prompt inputs (image, context); only
+            entries with the same scope can match
+
+    Returns:
+        The cached result dict, or None if no entry reaches the threshold
+    """
+    if not CACHE_ENABLED:
+        return None
+    try:
+        conn = _get_redis()
+        keys = conn.lrange(SEMANTIC_INDEX_KEY, 0, SEMANTIC_MAX_ENTRIES - 1)
+        if not keys:
+            return None
+
+        pipe = conn.pipeline()
+        for key in keys:
+            pipe.hmget(key, "scope", "vector")
+        entries = pipe.execute()
+
+        query = array("f", embedding)
+        best_key, best_score = None, SEMANTIC_CACHE_THRESHOLD
+        for key, (entry_scope, vector) in zip(keys, entries):
+            # Entries expire independently of the index
+            if vector is None or entry_scope.decode("utf-8") != scope:
+                continue
+            cached = array("f")
+            cached.frombytes(vector)
+            score = _dot(query, cached)
+            if score >= best_score:
+                best_key, best_score = key, score
+
+        if best_key is None:
+            return None
+        result = conn.hget(best_key, "result")
+        if result is None:
+            return None
+        print(f"  Semantic cache hit (similarity {best_score:.3f})")
+        return json.loads(result.decode("utf-8"))
+    except Exception as e:
+        print(f"Semantic cache read error: {e}")
+        return None
+
+
+def semantic_store(embedding: list[float], scope: str, prompt: str, result: dict) -> None:
+    """Store a research result under its prompt embedding."""
+    if not CACHE_ENABLED:
+        return
+    try:
+        conn = _get_redis()
+        key = f"sem:{hashlib.sha1(f'{scope}:{prompt}'.encode('utf-8')).hexdigest()}"
+        pipe = conn.pipeline()
+        pipe.hset(key, mapping={
+            "scope": scope,
+            "vector": array("f", embedding).tobytes(),
+            "result": json.dumps(result, ensure_ascii=False)
+        })
+        pipe.expire(key, CACHE_TTL_SECONDS)
+        pipe.lrem(SEMANTIC_INDEX_KEY, 0, key)
+        pipe.lpush(SEMANTIC_INDEX_KEY, key)
+        pipe.ltrim(SEMANTIC_INDEX_KEY, 0, SEMANTIC_MAX_ENTRIES - 1)
+        pipe.execute()
+    except Exception as e:
+        print(f"Semantic cache write error: {e}")
+
+
+async def semantic_lookup_async(embedding: list[float], scope: str) -> Optional[dict]:
+    """semantic_lookup without blocking the event loop."""
+    return await asyncio.to_thread(semantic_lookup, embedding, scope)
+
+
+async def semantic_store_async(embedding: list[float], scope: str, prompt: str, result: dict) -> None:
+    """semantic_store without blocking the event loop."""
+    await asyncio.to_thread(semantic_store, embedding, scope, prompt, result)
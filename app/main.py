@@ -5,6 +5,8 @@ Provides endpoints for job submission, status checking, and file downloads.
 
 import os
 import uuid
+import base64
+import asyncio
 from pathlib import Path
 from typing import Optional
 
@@ -12,14 +14,16 @@ from typing import Optional
 from dotenv import load_dotenv
 load_dotenv(override=True)
 
+from cachetools import LRUCache, TTLCache
 from fastapi import FastAPI, File, Form, UploadFile, HTTPException
 from fastapi.responses import FileResponse, JSONResponse
 from fastapi.staticfiles import StaticFiles
 from pydantic import BaseModel
 from rq import Queue
+from rq.exceptions import NoSuchJobError
 from rq.job import Job
 
-from app.queue import get_redis_connection
+from app.queue import get_redis_connection, PDF_ERROR_FILE, PDF_PENDING_MARKER
 
 # Configuration
 DATA_DIR = Path(os.getenv("DATA_DIR", "./data"))
@@ -45,6 +49,67 @@ redis_conn = get_redis_connection()
 task_queue = Queue("tasks", connection=redis_conn, is_async=not USE_FAKE_REDIS)
 
 
+# Map RQ status to our status
+STATUS_MAP = {
+    "queued": "queued",
+    "started": "started",
+    "finished": "finished",
+    "failed": "failed",
+    "deferred": "queued",
+    "scheduled": "queued"
+}
+TERMINAL_STATUSES = frozenset({"finished", "failed"})
+
+# Terminal job statuses don't change, so repeated UI polls are served
+# from memory instead of round-tripping to Redis
+_terminal_status_cache = TTLCache(maxsize=1024, ttl=300)
+
+# Output file listings keyed by job directory, invalidated by directory mtime
+_file_list_cache = LRUCache(maxsize=1024)
+
+
+def _list_output_files(job_dir: Path, rescan: bool = False) -> list[str]:
+    """
+    List visible output files of a job.
+    
+    Rescans only when the directory mtime changed, unless rescan is set:
+    mtime granularity can hide a change made within the same tick. The
+    cache is skipped while report.pdf is being rendered, so a listing taken
+    just before it lands is never served afterwards.
+    """
+    mtime = job_dir.stat().st_mtime_ns
+    pending = (job_dir / PDF_PENDING_MARKER).exists()
+    cached = _file_list_cache.get(job_dir)
+    if not rescan and not pending and cached is not None and cached[0] == mtime:
+        return cached[1]
+    
+    # Exclude hidden files (like .status)
+    files = [f.name for f in job_dir.iterdir() if f.is_file() and not f.name.startswith(".")]
+    if not pending:
+        _file_list_cache[job_dir] = (mtime, files)
+    return files
+
+
+def _pdf_pending(job_id: str, job_dir: Path) -> bool:
+    """
+    Whether report.pdf of a finished job is still being rendered.
+    
+    render_pdf_job removes the marker file when it ends, but not when its
+    work horse is killed (OOM, hard timeout). So with a real queue the
+    follow-up job decides: rendering is only pending while it is queued
+    or running.
+    """
+    if not (job_dir / PDF_PENDING_MARKER).exists():
+        return False
+    if USE_FAKE_REDIS:
+        return True
+    try:
+        pdf_job = Job.fetch(f"{job_id}-pdf", connection=redis_conn)
+    except NoSuchJobError:
+        return False
+    return STATUS_MAP.get(pdf_job.get_status()) in ("queued", "started")
+
+
 # Pydantic models for API responses
 class JobSubmitResponse(BaseModel):
     job_id: str
@@ -57,9 +122,18 @@ class JobStatusResponse(BaseModel):
     status: str
     error: Optional[str] = None
     files: Optional[list] = None
+    pending_files: Optional[list] = None
+    # Set when the job finished but rendering report.pdf failed
+    pdf_error: Optional[str] = None
     download_urls: Optional[dict] = None
 
 
+def _to_data_url(content: bytes, content_type: str) -> str:
+    """Build a base64 data URL for binary content."""
+    image_b64 = base64.b64encode(content).decode("utf-8")
+    return f"data:{content_type};base64,{image_b64}"
+
+
 @app.get("/")
 async def serve_index():
     """Serve the main HTML UI."""
@@ -90,11 +164,10 @@ async def create_job(
     image_data = None
     if image and image.filename:
         content = await image.read()
-        # Convert to base64 data URL for OpenAI
-        import base64
+        # Convert to base64 data URL for OpenAI (encode off the event loop;
+        # large images would otherwise stall concurrent requests)
         content_type = image.content_type or "image/png"
-        image_b64 = base64.b64encode(content).decode("utf-8")
-        image_data = f"data:{content_type};base64,{image_b64}"
+        image_data = await asyncio.to_thread(_to_data_url, content, content_type)
         print(f"[Job {job_id}] Image uploaded: {image.filename} ({len(content)} bytes)")
     
     # Prepare job parameters
@@ -113,7 +186,8 @@ async def create_job(
         # Synchronous execution for local development (no worker needed)
         print(f"[Job {job_id}] Running synchronously (USE_FAKE_REDIS=true)...")
         try:
-            run_research_job(job_params)
+            # Run in a thread: the job drives its own (per-thread) event loop
+            await asyncio.to_thread(run_research_job, job_params)
             # Store status in a simple file
             status_file = job_dir / ".status"
             status_file.write_text("finished")
@@ -140,6 +214,10 @@ async def create_job(
 @app.get("/jobs/{job_id}", response_model=JobStatusResponse)
 async def get_job_status(job_id: str):
     """Get the status of a job."""
+    cached = _terminal_status_cache.get(job_id)
+    if cached is not None:
+        return cached
+    
     job_dir = DATA_DIR / "jobs" / job_id
     
     if USE_FAKE_REDIS:
@@ -165,16 +243,7 @@ async def get_job_status(job_id: str):
         except Exception:
             raise HTTPException(status_code=404, detail="Job not found")
         
-        # Map RQ status to our status
-        status_map = {
-            "queued": "queued",
-            "started": "started",
-            "finished": "finished",
-            "failed": "failed",
-            "deferred": "queued",
-            "scheduled": "queued"
-        }
-        status = status_map.get(rq_job.get_status(), "unknown")
+        status = STATUS_MAP.get(rq_job.get_status(), "unknown")
         error = str(rq_job.exc_info) if status == "failed" and rq_job.exc_info else None
     
     response = JobStatusResponse(
@@ -186,11 +255,27 @@ async def get_job_status(job_id: str):
     if status == "finished":
         # List output files
         if job_dir.exists():
-            files = [f.name for f in job_dir.iterdir() if f.is_file() and not f.name.startswith(".")]
+            # report.pdf is rendered by a follow-up job after the report is
+            # ready. Checked before listing: the PDF is in place before the
+            # marker goes, so a listing taken after seeing no marker has it.
+            # That final listing is cached below, so it is always a rescan.
+            pdf_pending = _pdf_pending(job_id, job_dir)
+            files = _list_output_files(job_dir, rescan=not pdf_pending)
             response.files = files
             response.download_urls = {
                 f: f"/jobs/{job_id}/download/{f}" for f in files
             }
+            if pdf_pending:
+                response.pending_files = ["report.pdf"]
+            elif "report.pdf" not in files:
+                error_path = job_dir / PDF_ERROR_FILE
+                if error_path.exists():
+                    # First line only: "<exception type>: <message>"
+                    response.pdf_error = error_path.read_text(encoding="utf-8").split("\n", 1)[0]
+    
+    # Only cache once every output file is ready
+    if status in TERMINAL_STATUSES and not response.pending_files:
+        _terminal_status_cache[job_id] = response
     
     return response
 
@@ -203,8 +288,7 @@ async def list_job_files(job_id: str):
     if not job_dir.exists():
         raise HTTPException(status_code=404, detail="Job not found")
     
-    # Exclude hidden files (like .status)
-    files = [f.name for f in job_dir.iterdir() if f.is_file() and not f.name.startswith(".")]
+    files = _list_output_files(job_dir)
     
     return {
         "job_id": job_id,
@@ -9,15 +9,27 @@ from rq import Queue
 # Configuration
 REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379")
 USE_FAKE_REDIS = os.getenv("USE_FAKE_REDIS", "false").lower() == "true"
+# Run jobs in the worker process instead of a forked work horse per job,
+# so the cached agent and its connection pools are reused across jobs
+USE_SIMPLE_WORKER = os.getenv("USE_SIMPLE_WORKER", "false").lower() == "true"
+
+# Hidden marker in a job directory while report.pdf is still being rendered
+PDF_PENDING_MARKER = ".pdf_pending"
+# Hidden file holding the error when rendering report.pdf failed
+PDF_ERROR_FILE = ".pdf_error"
 
 # Singleton for fakeredis connection (must be shared between API and worker)
 _fake_redis_conn = None
 
 
-def get_redis_connection():
+def get_redis_connection(**connection_kwargs):
     """
     Get a Redis connection instance.
     Uses fakeredis if USE_FAKE_REDIS=true, otherwise real Redis.
+    
+    Args:
+        **connection_kwargs: Extra options for Redis.from_url (e.g. socket
+            timeouts); ignored for fakeredis
     """
     global _fake_redis_conn
     
@@ -29,7 +41,7 @@ def get_redis_connection():
         return _fake_redis_conn
     else:
         from redis import Redis
-        return Redis.from_url(REDIS_URL)
+        return Redis.from_url(REDIS_URL, **connection_kwargs)
 
 
 def get_task_queue() -> Queue:
@@ -3,11 +3,51 @@ Background task definitions for research jobs.
 """
 
 import json
+import asyncio
+import threading
 import traceback
 from pathlib import Path
 
 from app.agent import ResearchAgent
-from app.utils_files import generate_pdf_report
+from app.queue import get_task_queue, PDF_ERROR_FILE, PDF_PENDING_MARKER, USE_FAKE_REDIS, USE_SIMPLE_WORKER
+from app.tools_wikipedia import warmup as warmup_wikipedia
+from app.utils_files import generate_pdf_report, generate_pdf_report_async
+
+# Per-thread agent and event loop, reused across jobs so the OpenAI and
+# Wikipedia HTTP connection pools (which are bound to their event loop)
+# stay warm between jobs
+_local = threading.local()
+
+# A forked work horse runs one job and exits, so it renders PDFs itself;
+# long-lived job processes (SimpleWorker, inline jobs with fakeredis) use
+# the shared process pool so rendering doesn't hold their GIL
+RENDER_PDF_IN_POOL = USE_SIMPLE_WORKER or USE_FAKE_REDIS
+
+
+def _get_runner() -> asyncio.Runner:
+    """Get the long-lived event loop runner for the current thread."""
+    runner = getattr(_local, "runner", None)
+    if runner is None:
+        runner = _local.runner = asyncio.Runner()
+    return runner
+
+
+def _get_agent() -> ResearchAgent:
+    """Get the ResearchAgent for the current thread (created on first use)."""
+    agent = getattr(_local, "agent", None)
+    if agent is None:
+        agent = _local.agent = ResearchAgent()
+    return agent
+
+
+def warmup_connections() -> None:
+    """
+    Establish the current thread's Wikipedia connection before any job runs.
+    
+    Only useful when jobs later run on this same thread (e.g. SimpleWorker);
+    a forked work horse must not reuse sockets opened by its parent.
+    """
+    _get_runner().run(warmup_wikipedia())
 
 
 def run_research_job(params: dict) -> dict:
@@ -17,7 +57,8 @@ def run_research_job(params: dict) -> dict:
     This is the main task that:
     1. Processes the input (prompt, image, context)
     2. Runs the research agent with Wikipedia tools
-    3. Generates output files (report.md, report.pdf, sources.json)
+    3. Generates output files (report.md, sources.json)
+    4. Enqueues render_pdf_job to produce report.pdf
     
     Args:
         params: Dictionary with job_id, prompt, image_data, context_text, job_dir
@@ -35,42 +76,42 @@ def run_research_job(params: dict) -> dict:
     print(f"[Job {job_id}] Prompt: {prompt[:100]}...")
     
     try:
-        # Initialize the research agent
-        agent = ResearchAgent()
-        
-        # Run the research
-        result = agent.research(
-            prompt=prompt,
-            image_data=image_data,
-            context_text=context_text
-        )
+        # Reuse the research agent (and its connection pools) across jobs
+        agent = _get_agent()
         
-        # Save outputs
-        report_content = result["report"]
-        sources = result["sources"]
-        
-        # Save report.md
+        # Run the research, streaming the report into report.md
         report_md_path = job_dir / "report.md"
         with open(report_md_path, "w", encoding="utf-8") as f:
-            f.write(report_content)
+            result = _get_runner().run(agent.research(
+                prompt=prompt,
+                image_data=image_data,
+                context_text=context_text,
+                report_file=f
+            ))
         print(f"[Job {job_id}] Saved report.md")
         
         # Save sources.json
         sources_path = job_dir / "sources.json"
-        with open(sources_path, "w", encoding="utf-8") as f:
-            json.dump(sources, f, indent=2, ensure_ascii=False)
+        sources_path.write_text(json.dumps(result["sources"], indent=2, ensure_ascii=False), encoding="utf-8")
         print(f"[Job {job_id}] Saved sources.json")
         
-        # Generate PDF
-        pdf_path = job_dir / "report.pdf"
-        generate_pdf_report(report_content, str(pdf_path))
-        print(f"[Job {job_id}] Saved report.pdf")
+        # Render the PDF in a follow-up job so this one finishes as soon as
+        # the report is written; the marker tells the API it is still pending
+        (job_dir / PDF_PENDING_MARKER).touch()
+        get_task_queue().enqueue(
+            render_pdf_job,
+            {"job_id": job_id, "job_dir": str(job_dir)},
+            job_id=f"{job_id}-pdf",
+            job_timeout=300
+        )
+        print(f"[Job {job_id}] Enqueued report.pdf rendering")
         
         print(f"[Job {job_id}] Job completed successfully")
         
         return {
             "status": "success",
-            "files": ["report.md", "report.pdf", "sources.json"]
+            "files": ["report.md", "sources.json"],
+            "pending_files": ["report.pdf"]
         }
         
     except Exception as e:
@@ -79,8 +120,49 @@ def run_research_job(params: dict) -> dict:
         
         # Save error to file
         error_path = job_dir / "error.txt"
-        with open(error_path, "w", encoding="utf-8") as f:
-            f.write(error_msg)
+        error_path.write_text(error_msg, encoding="utf-8")
         
         raise
 
+
+
+def render_pdf_job(params: dict) -> dict:
+    """
+    Render report.pdf for a finished research job.
+    
+    Args:
+        params: Dictionary with job_id and job_dir
+    
+    Returns:
+        Dictionary with the rendered file
+    """
+    job_id = params["job_id"]
+    job_dir = Path(params["job_dir"])
+    
+    try:
+        report_content = (job_dir / "report.md").read_text(encoding="utf-8")
+        output_path = str(job_dir / "report.pdf")
+        if RENDER_PDF_IN_POOL:
+            generate_pdf_report_async(report_content, output_path).result()
+        else:
+            generate_pdf_report(report_content, output_path)
+        print(f"[Job {job_id}] Saved report.pdf")
+        (job_dir / PDF_ERROR_FILE).unlink(missing_ok=True)
+        
+        return {
+            "status": "success",
+            "files": ["report.pdf"]
+        }
+        
+    except Exception as e:
+        error_msg = f"{type(e).__name__}: {str(e)}\n{traceback.format_exc()}"
+        print(f"[Job {job_id}] PDF rendering failed: {error_msg}")
+        
+        # Save error to a hidden file (the report itself is done, so it must
+        # not show up among the job's output files; see JobStatusResponse)
+        (job_dir / PDF_ERROR_FILE).write_text(error_msg, encoding="utf-8")
+        
+        raise
+    
+    finally:
+        (job_dir / PDF_PENDING_MARKER).unlink(missing_ok=True)
@@ -5,11 +5,22 @@ Provides search and summary functions using the Wikipedia API.
 No API key required - uses the public MediaWiki API.
 """
 
-import urllib.parse
-import urllib.request
-import json
+import asyncio
+import weakref
 from typing import Optional
 
+import aiohttp
+import orjson
+from yarl import URL
+
+from app.cache import (
+    wiki_key,
+    get_cached_json_async,
+    set_cached_json_async,
+    get_cached_json_many_async,
+    set_cached_json_many_async
+)
+
 
 # Wikipedia API base URL
 WIKI_API_URL = "https://en.wikipedia.org/w/api.php"
@@ -17,17 +28,76 @@ WIKI_API_URL = "https://en.wikipedia.org/w/api.php"
 # User-Agent required by Wikipedia API (https://meta.wikimedia.org/wiki/User-Agent_policy)
 USER_AGENT = "AgenticResearchAssistant/1.0 (https://github.com/Chouaib6801/agentic-app-bonus)"
 
+# Parsed once and reused for every request
+_WIKI_API = URL(WIKI_API_URL)
+
+# Static query parameters for each tool (per-call values are merged in)
+_SEARCH_PARAMS = {
+    "action": "opensearch",
+    "namespace": 0,
+    "format": "json"
+}
+_SUMMARY_PARAMS = {
+    "action": "query",
+    "prop": "extracts",
+    "exintro": 1,  # Only get intro section
+    "explaintext": 1,  # Plain text, not HTML
+    "exlimit": "max",
+    "format": "json"
+}
+
+# MediaWiki caps the number of titles per query (and extracts per query with exintro)
+MAX_TITLES_PER_QUERY = 20
+
+# One pooled session per event loop (aiohttp sessions cannot be shared between loops)
+_sessions: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, aiohttp.ClientSession]" = weakref.WeakKeyDictionary()
+
 
-def _make_request(url: str) -> dict | list | None:
-    """Make a request to Wikipedia API with proper headers."""
-    request = urllib.request.Request(url)
-    request.add_header("User-Agent", USER_AGENT)
+def _get_session() -> aiohttp.ClientSession:
+    """Get the pooled HTTP session for the running event loop."""
+    loop = asyncio.get_running_loop()
+    session = _sessions.get(loop)
+    if session is None or session.closed:
+        session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit=20, ttl_dns_cache=300, keepalive_timeout=60),
+            timeout=aiohttp.ClientTimeout(total=10),
+            headers={"User-Agent": USER_AGENT}
+        )
+        _sessions[loop] = session
+    return session
+
+
+async def close_session() -> None:
+    """Close the pooled HTTP session for the running event loop, if any."""
+    session = _sessions.pop(asyncio.get_running_loop(), None)
+    if session is not None:
+        await session.close()
+
+
+async def warmup() -> None:
+    """
+    Open a pooled connection to the Wikipedia API ahead of the first job.
     
-    with urllib.request.urlopen(request, timeout=10) as response:
-        return json.loads(response.read().decode("utf-8"))
+    Pays DNS resolution and the TLS handshake up front; failures are
+    ignored since the first real request will simply retry them.
+    """
+    try:
+        async with _get_session().head(_WIKI_API, timeout=aiohttp.ClientTimeout(total=5)):
+            pass
+    except Exception as e:
+        print(f"Wikipedia warm-up error: {e}")
 
 
-def wikipedia_search(query: str, limit: int = 5) -> list[str]:
+async def _make_request(params: dict) -> dict | list | None:
+    """Make a request to Wikipedia API (User-Agent is set on the session)."""
+    session = _get_session()
+    async with session.get(_WIKI_API, params=params) as response:
+        response.raise_for_status()
+        # orjson parses the raw bytes directly (no text decode step)
+        return orjson.loads(await response.read())
+
+
+async def wikipedia_search_async(query: str, limit: int = 5) -> list[str]:
     """
     Search Wikipedia for articles matching the query.
     
@@ -38,20 +108,18 @@ def wikipedia_search(query: str, limit: int = 5) -> list[str]:
     Returns:
         List of article titles matching the query
     """
-    params = {
-        "action": "opensearch",
-        "search": query,
-        "limit": limit,
-        "namespace": 0,
-        "format": "json"
-    }
+    params = {**_SEARCH_PARAMS, "search": query, "limit": limit}
     
-    url = f"{WIKI_API_URL}?{urllib.parse.urlencode(params)}"
+    cache_key = wiki_key("wikipedia_search", query, limit)
+    cached = await get_cached_json_async(cache_key)
+    if cached is not None:
+        return cached
     
     try:
-        data = _make_request(url)
+        data = await _make_request(params)
         # OpenSearch returns [query, [titles], [descriptions], [urls]]
         if data and len(data) >= 2:
+            await set_cached_json_async(cache_key, data[1])
             return data[1]
         return []
     except Exception as e:
@@ -59,7 +127,79 @@ def wikipedia_search(query: str, limit: int = 5) -> list[str]:
         return []
 
 
-def wikipedia_summary(title: str, sentences: int = 5) -> Optional[str]:
+async def _fetch_summary_batch(batch: list[str], sentences: int) -> dict[str, str]:
+    """Fetch extracts for one batch of titles (at most MAX_TITLES_PER_QUERY)."""
+    params = {**_SUMMARY_PARAMS, "titles": "|".join(batch), "exsentences": sentences}
+    data = await _make_request(params)
+    if not data:
+        return {}
+    query = data.get("query", {})
+    
+    # Map normalized titles (e.g. first-letter capitalization) back to the requested ones
+    requested = {title: title for title in batch}
+    for item in query.get("normalized", []):
+        if item.get("from") in requested:
+            requested[item["to"]] = requested.pop(item["from"])
+    
+    summaries = {}
+    for page_id, page_data in query.get("pages", {}).items():
+        title = requested.get(page_data.get("title"))
+        # Negative ids (and the "missing" flag) mean page not found
+        if title is None or page_id.startswith("-") or "missing" in page_data:
+            continue
+        summaries[title] = page_data.get("extract", "")
+    await set_cached_json_many_async({
+        wiki_key("wikipedia_summary", title, sentences): extract
+        for title, extract in summaries.items()
+    })
+    return summaries
+
+
+async def wikipedia_summaries_bulk(titles: list[str], sentences: int = 5) -> dict[str, str]:
+    """
+    Get summaries/extracts of several Wikipedia articles.
+    
+    Titles are fetched in batched requests, and the batches are issued
+    concurrently.
+    
+    Args:
+        titles: Exact titles of the Wikipedia articles
+        sentences: Number of sentences to extract per article (default: 5)
+    
+    Returns:
+        Mapping of requested title to article summary text; titles that
+        were not found are omitted
+    """
+    summaries = {}
+    missing = []
+    cached_summaries = await get_cached_json_many_async([
+        wiki_key("wikipedia_summary", title, sentences) for title in titles
+    ])
+    for title, cached in zip(titles, cached_summaries):
+        if cached is not None:
+            summaries[title] = cached
+        elif title not in missing:
+            missing.append(title)
+    
+    batches = [
+        missing[start:start + MAX_TITLES_PER_QUERY]
+        for start in range(0, len(missing), MAX_TITLES_PER_QUERY)
+    ]
+    results = await asyncio.gather(
+        *(_fetch_summary_batch(batch, sentences) for batch in batches),
+        return_exceptions=True
+    )
+    for result in results:
+        if isinstance(result, Exception):
+            print(f"Wikipedia summary error: {result}")
+            continue
+        summaries.update(result)
+    
+    # Preserve the requested title order
+    return {title: summaries[title] for title in titles if title in summaries}
+
+
+async def wikipedia_summary_async(title: str, sentences: int = 5) -> Optional[str]:
     """
     Get a summary/extract of a Wikipedia article.
     
@@ -70,32 +210,26 @@ def wikipedia_summary(title: str, sentences: int = 5) -> Optional[str]:
     Returns:
         Article summary text, or None if not found
     """
-    params = {
-        "action": "query",
-        "titles": title,
-        "prop": "extracts",
-        "exintro": True,  # Only get intro section
-        "explaintext": True,  # Plain text, not HTML
-        "exsentences": sentences,
-        "format": "json"
-    }
-    
-    url = f"{WIKI_API_URL}?{urllib.parse.urlencode(params)}"
-    
+    summaries = await wikipedia_summaries_bulk([title], sentences)
+    return summaries.get(title)
+
+
+async def _run_and_close(coro):
+    """Run a tool coroutine, then close the session of this short-lived loop."""
     try:
-        data = _make_request(url)
-        if not data:
-            return None
-        pages = data.get("query", {}).get("pages", {})
-        
-        for page_id, page_data in pages.items():
-            if page_id != "-1":  # -1 means page not found
-                return page_data.get("extract", "")
-        
-        return None
-    except Exception as e:
-        print(f"Wikipedia summary error: {e}")
-        return None
+        return await coro
+    finally:
+        await close_session()
+
+
+def wikipedia_search(query: str, limit: int = 5) -> list[str]:
+    """Synchronous wrapper around wikipedia_search_async (not for use inside an event loop)."""
+    return asyncio.run(_run_and_close(wikipedia_search_async(query, limit)))
+
+
+def wikipedia_summary(title: str, sentences: int = 5) -> Optional[str]:
+    """Synchronous wrapper around wikipedia_summary_async (not for use inside an event loop)."""
+    return asyncio.run(_run_and_close(wikipedia_summary_async(title, sentences)))
 
 
 # Tool definitions for LLM function calling (if using OpenAI tools feature)
@@ -8,165 +8,733 @@ Handles creation of:
 from reportlab.lib.pagesizes import letter
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.lib.units import inch
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer
+from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Flowable
+from reportlab.pdfbase.pdfmetrics import stringWidth
+from reportlab import rl_config, Version as REPORTLAB_VERSION
 from reportlab.lib.enums import TA_LEFT, TA_CENTER
+from concurrent.futures import Future, ProcessPoolExecutor
+from functools import lru_cache
+from pathlib import Path
+import io
+import os
 import re
+import shutil
+import hashlib
+import threading
+import time
 
+# Optional: JIT-compiled line classifier for large reports
+try:
+    import numpy as np
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
 
-def generate_pdf_report(markdown_content: str, output_path: str) -> None:
+# Optional: compiled parser (python setup.py build_ext --inplace)
+try:
+    from app._md_parser import parse as _compiled_parse_markdown
+    CYTHON_PARSER_AVAILABLE = True
+except ImportError:
+    CYTHON_PARSER_AVAILABLE = False
+
+
+# Rendered PDFs keyed by markdown content hash, shared by all jobs
+PDF_CACHE_DIR = Path(os.getenv("PDF_CACHE_DIR", os.path.join(os.getenv("DATA_DIR", "./data"), "pdf_cache")))
+# Cached PDFs older than this, and the oldest ones beyond the size bound,
+# are removed whenever a new PDF is added
+PDF_CACHE_MAX_AGE_SECONDS = int(os.getenv("PDF_CACHE_MAX_AGE_SECONDS", str(7 * 24 * 3600)))  # 7 days
+PDF_CACHE_MAX_BYTES = int(os.getenv("PDF_CACHE_MAX_BYTES", str(512 * 1024 * 1024)))
+# Part of the cache key: bump whenever a change to the parser, styles or
+# layout changes the rendered output
+PDF_RENDER_VERSION = "1"
+
+# Number of processes rendering PDFs for generate_pdf_report_async (only
+# worth it in long-lived processes; see render_pdf_job)
+PDF_WORKERS = int(os.getenv("PDF_WORKERS", "2"))
+_pdf_executor: ProcessPoolExecutor | None = None
+_pdf_executor_lock = threading.Lock()
+
+# Exercises every block type (and so every font) when warming up
+_WARMUP_MARKDOWN = """# Warmup
+
+## Section
+
+### Subsection
+
+Body text with **bold** and *italic* words.
+
+- List item
+1. Ordered item
+
+---
+"""
+
+# HTML special characters and their entities
+_HTML_ESCAPE = str.maketrans({'&': '&amp;', '<': '&lt;', '>': '&gt;'})
+
+# Inline formatting delimiters and the ReportLab tags they map to
+_INLINE_TAGS = {
+    '**': ('<b>', '</b>'),
+    '__': ('<b>', '</b>'),
+    '*': ('<i>', '</i>'),
+    '_': ('<i>', '</i>'),
+}
+
+# Block kinds produced by _parse_blocks (also the per-line tags of _classify_lines,
+# plus _RECHECK for lines the byte-level classifier leaves to the regex)
+_BLANK, _H1, _H2, _H3, _H4, _UL, _OL, _HR, _PARA, _RECHECK = range(10)
+
+# Small reports stay on the regex pass so they never pay the one-time JIT compile
+JIT_MIN_CHARS = 8 * 1024
+
+# Matches every "special" markdown line (headers, list items, rules) in one
+# pass; the text between matches is regular paragraph text. Lines are
+# trimmed of any whitespace but the newline, like str.strip() per line
+_BLOCK_CLASSIFIER = re.compile(
+    r'^[^\S\n]*(?:'
+    r'(?P<h>#{1,4}) (?P<htext>[^\n]*\S)'  # "# Header" ... "#### Header"
+    r'|[-*] (?P<litext>[^\n]*\S)'  # "- item" / "* item"
+    r'|(?P<ol>\d+\.[^\S\n][^\n]*\S)'  # "1. item"
+    r'|(?P<hr>---|\*\*\*|___)'  # horizontal rule
+    r')[^\S\n]*$',
+    re.MULTILINE
+)
+
+# Blank line separating paragraphs
+_PARAGRAPH_BREAK = re.compile(r'\n[^\S\n]*\n')
+
+
+# Paragraph styles, built once per process (styles are read-only after construction)
+_STYLES = getSampleStyleSheet()
+
+_TITLE_STYLE = ParagraphStyle(
+    'CustomTitle',
+    parent=_STYLES['Heading1'],
+    fontSize=18,
+    spaceAfter=20,
+    alignment=TA_CENTER
+)
+
+_H1_STYLE = ParagraphStyle(
+    'CustomH1',
+    parent=_STYLES['Heading1'],
+    fontSize=16,
+    spaceAfter=12,
+    spaceBefore=16
+)
+
+_H2_STYLE = ParagraphStyle(
+    'CustomH2',
+    parent=_STYLES['Heading2'],
+    fontSize=14,
+    spaceAfter=10,
+    spaceBefore=12
+)
+
+_H3_STYLE = ParagraphStyle(
+    'CustomH3',
+    parent=_STYLES['Heading3'],
+    fontSize=12,
+    spaceAfter=8,
+    spaceBefore=10
+)
+
+_BODY_STYLE = ParagraphStyle(
+    'CustomBody',
+    parent=_STYLES['Normal'],
+    fontSize=10,
+    spaceAfter=8,
+    leading=14
+)
+
+
+@lru_cache(maxsize=4096)
+def escape_html(text: str) -> str:
+    """Escape HTML special characters (one C-level pass via str.translate)."""
+    return text.translate(_HTML_ESCAPE)
+
+
+@lru_cache(maxsize=4096)
+def convert_inline_formatting(text: str) -> str:
     """
-    Generate a PDF report from markdown content.
+    Convert markdown inline formatting to ReportLab XML.
     
-    Uses ReportLab for PDF generation with simple styling.
-    Converts basic markdown formatting to PDF elements.
+    Single left-to-right scan: **text**/__text__ become bold and
+    *text*/_text_ italic. A delimiter only opens a tag if the same
+    delimiter appears again later, only the innermost open tag can be
+    closed, and openers left unclosed at the end are put back as plain
+    text, so the output is always well-nested.
+    """
+    out = []
+    open_tags = []  # (delimiter, index of its opening tag in out)
+    i = 0
+    n = len(text)
+    # Next '*' and '_' at or after i (-1 once there are none left); only
+    # searched again after being passed, so the text is scanned once
+    star = text.find('*')
+    under = text.find('_')
     
-    Args:
-        markdown_content: The markdown report content
-        output_path: Path where the PDF should be saved
+    while i < n:
+        # Copy plain text up to the next delimiter character in one slice
+        if 0 <= star < i:
+            star = text.find('*', i)
+        if 0 <= under < i:
+            under = text.find('_', i)
+        if star < 0 and under < 0:
+            out.append(text[i:])
+            break
+        j = under if star < 0 or 0 <= under < star else star
+        if j > i:
+            out.append(text[i:j])
+            i = j
+        
+        ch = text[i]
+        delim = ch * 2 if text.startswith(ch * 2, i) else ch
+        
+        # Close the innermost tag ("***" closes italic before bold)
+        if open_tags and (
+            open_tags[-1][0] == delim
+            or (open_tags[-1][0] == ch and any(d == delim for d, _ in open_tags))
+        ):
+            delim, _ = open_tags.pop()
+            out.append(_INLINE_TAGS[delim][1])
+            i += len(delim)
+            continue
+        
+        end = i + len(delim)
+        if all(d != delim for d, _ in open_tags) and text.find(delim, end + 1) >= 0:
+            open_tags.append((delim, len(out)))
+            out.append(_INLINE_TAGS[delim][0])
+        else:
+            out.append(delim)
+        i = end
+    
+    # Unclosed openers are literal text after all
+    for delim, index in open_tags:
+        out[index] = delim
+    return ''.join(out)
+
+
+def _paragraphs(text: str):
     """
-    # Create PDF document
-    doc = SimpleDocTemplate(
-        output_path,
-        pagesize=letter,
-        rightMargin=72,
-        leftMargin=72,
-        topMargin=72,
-        bottomMargin=72
-    )
+    Yield the paragraphs of a run of regular text.
     
-    # Get default styles and create custom ones
-    styles = getSampleStyleSheet()
+    Line breaks become spaces; the leftover indentation is harmless since
+    ReportLab collapses runs of whitespace when it wraps the text.
+    """
+    for paragraph in _PARAGRAPH_BREAK.split(text):
+        paragraph = paragraph.strip()
+        if paragraph:
+            yield _PARA, paragraph.replace('\n', ' ')
+
+
+def _match_block(match: re.Match) -> tuple:
+    """Turn a _BLOCK_CLASSIFIER match into a (kind, text) block."""
+    group = match.lastgroup
+    if group == 'htext':
+        return _H1 + len(match.group('h')) - 1, match.group('htext')
+    if group == 'litext':
+        return _UL, match.group('litext')
+    if group == 'ol':
+        return _OL, match.group('ol')
+    return _HR, ''
+
+
+def _parse_blocks_regex(markdown_content: str):
+    """
+    Split markdown into (kind, text) blocks.
     
-    # Custom styles
-    title_style = ParagraphStyle(
-        'CustomTitle',
-        parent=styles['Heading1'],
-        fontSize=18,
-        spaceAfter=20,
-        alignment=TA_CENTER
-    )
+    A single regex traversal finds the header/list/rule lines; the regions
+    between matches are split into paragraphs.
+    """
+    pos = 0
+    for match in _BLOCK_CLASSIFIER.finditer(markdown_content):
+        yield from _paragraphs(markdown_content[pos:match.start()])
+        pos = match.end()
+        yield _match_block(match)
     
-    h1_style = ParagraphStyle(
-        'CustomH1',
-        parent=styles['Heading1'],
-        fontSize=16,
-        spaceAfter=12,
-        spaceBefore=16
-    )
+    yield from _paragraphs(markdown_content[pos:])
+
+
+if NUMBA_AVAILABLE:
+    @njit(cache=True)
+    def _is_space(c):
+        # ASCII characters matched by the regex \s
+        return c == 32 or 9 <= c <= 13 or 28 <= c <= 31
     
-    h2_style = ParagraphStyle(
-        'CustomH2',
-        parent=styles['Heading2'],
-        fontSize=14,
-        spaceAfter=10,
-        spaceBefore=12
-    )
+    @njit(cache=True)
+    def _classify_lines(buf):
+        """
+        Tag every line of a UTF-8 buffer with the same rules as _BLOCK_CLASSIFIER.
+        
+        Returns (starts, ends, tags, count): the byte span of each line's
+        text (header/list text without the marker, otherwise the line
+        without surrounding spaces), its block kind and the number of lines.
+        Lines whose kind hinges on a non-ASCII character (Unicode spaces and
+        digits count for the regex) are tagged _RECHECK for the caller, and
+        so are lines starting with one (it may be a space to trim).
+        """
+        n = buf.size
+        starts = np.empty(n + 1, dtype=np.int64)
+        ends = np.empty(n + 1, dtype=np.int64)
+        tags = np.empty(n + 1, dtype=np.int8)
+        count = 0
+        start = 0
+        
+        while start <= n:
+            end = start
+            while end < n and buf[end] != 10:
+                end += 1
+            
+            # Trim ASCII whitespace on both sides
+            s = start
+            while s < end and _is_space(buf[s]):
+                s += 1
+            e = end
+            while e > s and _is_space(buf[e - 1]):
+                e -= 1
+            
+            tag = 8  # _PARA
+            text_start = s
+            c = buf[s] if s < e else 0
+            # A multi-byte first or last character may be a Unicode space
+            # (still to be trimmed) or a Unicode digit
+            marker = c == 35 or c == 45 or c == 42 or c == 95 or 48 <= c <= 57
+            
+            if s == e:
+                tag = 0  # _BLANK
+            elif c >= 0x80 or (marker and buf[e - 1] >= 0x80):
+                tag = 9  # _RECHECK
+            elif c == 35:  # '#'
+                k = s
+                while k < e and buf[k] == 35:
+                    k += 1
+                if k - s <= 4 and k + 1 < e and buf[k] == 32:
+                    tag = k - s  # _H1.._H4
+                    text_start = k + 1
+            elif c == 45 or c == 42:  # '-' / '*'
+                if s + 2 < e and buf[s + 1] == 32:
+                    tag = 5  # _UL
+                    text_start = s + 2
+                elif e - s == 3 and buf[s + 1] == c and buf[s + 2] == c:
+                    tag = 7  # _HR
+            elif c == 95:  # '_'
+                if e - s == 3 and buf[s + 1] == 95 and buf[s + 2] == 95:
+                    tag = 7  # _HR
+            elif marker:  # digit
+                k = s
+                while k < e and 48 <= buf[k] <= 57:
+                    k += 1
+                if k < e and buf[k] >= 0x80:
+                    tag = 9  # _RECHECK
+                elif k + 2 < e and buf[k] == 46:
+                    if buf[k + 1] >= 0x80:
+                        tag = 9  # _RECHECK
+                    elif _is_space(buf[k + 1]):
+                        tag = 6  # _OL
+            
+            starts[count] = text_start
+            ends[count] = e
+            tags[count] = tag
+            count += 1
+            start = end + 1
+        
+        return starts, ends, tags, count
+
+
+def _parse_blocks_jit(markdown_content: str):
+    """Split markdown into (kind, text) blocks using _classify_lines."""
+    data = markdown_content.encode('utf-8')
+    starts, ends, tags, count = _classify_lines(np.frombuffer(data, dtype=np.uint8))
     
-    h3_style = ParagraphStyle(
-        'CustomH3',
-        parent=styles['Heading3'],
-        fontSize=12,
-        spaceAfter=8,
-        spaceBefore=10
-    )
+    # Collapse each run of paragraph lines (blank lines included) into one
+    # span with array masks, so only headers, list items, rules and
+    # paragraph runs reach the Python loop; _paragraphs splits the runs
+    lines = np.flatnonzero(tags[:count] != _BLANK)
+    kinds = tags[lines]
+    span_starts = starts[lines]
+    span_ends = ends[lines]
+    is_para = kinds == _PARA
+    run_first = is_para.copy()
+    run_first[1:] &= ~is_para[:-1]
+    run_last = is_para.copy()
+    run_last[:-1] &= ~is_para[1:]
+    span_ends[run_first] = span_ends[run_last]
+    keep = ~is_para | run_first
     
-    body_style = ParagraphStyle(
-        'CustomBody',
-        parent=styles['Normal'],
-        fontSize=10,
-        spaceAfter=8,
-        leading=14
-    )
+    # Spans start and end on ASCII characters, so every slice decodes cleanly
+    para_start = None
+    para_end = 0
+    for kind, start, end in zip(kinds[keep].tolist(), span_starts[keep].tolist(), span_ends[keep].tolist()):
+        if kind == _RECHECK:
+            match = _BLOCK_CLASSIFIER.match(data[start:end].decode('utf-8'))
+            if match is None:
+                kind = _PARA
+            else:
+                block = _match_block(match)
+        if kind == _PARA:
+            if para_start is None:
+                para_start = start
+            para_end = end
+            continue
+        if para_start is not None:
+            yield from _paragraphs(data[para_start:para_end].decode('utf-8'))
+            para_start = None
+        if kind == _RECHECK:
+            yield block
+        elif kind == _HR:
+            yield _HR, ''
+        else:
+            yield kind, data[start:end].decode('utf-8')
     
-    # Process markdown content
-    story = []
-    lines = markdown_content.split('\n')
+    if para_start is not None:
+        yield from _paragraphs(data[para_start:para_end].decode('utf-8'))
+
+
+def _parse_blocks(markdown_content: str):
+    """
+    Split markdown into (kind, text) blocks.
     
-    current_paragraph = []
-    is_first_heading = True
+    Large reports go through the Numba line classifier when it is
+    installed; everything else uses the regex pass.
+    """
+    if NUMBA_AVAILABLE and len(markdown_content) >= JIT_MIN_CHARS:
+        return _parse_blocks_jit(markdown_content)
+    return _parse_blocks_regex(markdown_content)
+
+
+def _markup_blocks(markdown_content: str) -> list:
+    """
+    Split markdown into (kind, markup) blocks in pure Python.
     
-    def flush_paragraph():
-        """Add accumulated paragraph text to story."""
-        if current_paragraph:
-            text = ' '.join(current_paragraph)
+    Header text is escaped; list and paragraph text is also converted
+    to ReportLab inline markup.
+    """
+    blocks = []
+    for kind, text in _parse_blocks(markdown_content):
+        if kind == _UL or kind == _OL or kind == _PARA:
+            text = convert_inline_formatting(escape_html(text))
+        elif kind != _HR:
             text = escape_html(text)
-            text = convert_inline_formatting(text)
-            if text.strip():
-                story.append(Paragraph(text, body_style))
-            current_paragraph.clear()
-    
-    def escape_html(text: str) -> str:
-        """Escape HTML special characters."""
-        text = text.replace('&', '&amp;')
-        text = text.replace('<', '&lt;')
-        text = text.replace('>', '&gt;')
-        return text
-    
-    def convert_inline_formatting(text: str) -> str:
-        """Convert markdown inline formatting to ReportLab XML."""
-        # Bold: **text** or __text__
-        text = re.sub(r'\*\*(.+?)\*\*', r'<b>\1</b>', text)
-        text = re.sub(r'__(.+?)__', r'<b>\1</b>', text)
-        # Italic: *text* or _text_
-        text = re.sub(r'\*(.+?)\*', r'<i>\1</i>', text)
-        text = re.sub(r'_(.+?)_', r'<i>\1</i>', text)
-        return text
-    
-    for line in lines:
-        stripped = line.strip()
+        blocks.append((kind, text))
+    return blocks
+
+
+# Use the compiled parser (same output) when it has been built
+_parse_markdown = _compiled_parse_markdown if CYTHON_PARSER_AVAILABLE else _markup_blocks
+
+
+class _PlainText(Flowable):
+    """
+    Paragraph without markup, drawn straight onto the canvas.
+    
+    Uses the same greedy word wrap as Paragraph (including its small
+    space shrinkage) and emits the lines with one text object, skipping
+    Paragraph's markup parser and fragment layout. Text with a word wider
+    than the frame is handed to Paragraph, which knows how to split it.
+    """
+    
+    def __init__(self, text: str, style: ParagraphStyle, lines=None, wrap_width=None):
+        super().__init__()
+        self.text = text
+        self.style = style
+        self.lines = lines  # [(line text, line width)]
+        self.wrap_width = wrap_width
+        self.paragraph = None
+    
+    def _break_lines(self, width: float):
+        """Greedy word wrap, or None if a single word does not fit."""
+        font_name, font_size = self.style.fontName, self.style.fontSize
+        space = stringWidth(' ', font_name, font_size)
+        shrink = rl_config.spaceShrinkage * space
+        lines = []
+        words = []
+        current = -space
         
-        # Skip empty lines (flush paragraph)
-        if not stripped:
-            flush_paragraph()
-            continue
+        for word in self.text.split():
+            word_width = stringWidth(word, font_name, font_size)
+            if word_width > width:
+                return None
+            new_width = current + space + word_width
+            if words and new_width > width + shrink * len(words):
+                lines.append((' '.join(words), current))
+                words = [word]
+                current = word_width
+            else:
+                words.append(word)
+                current = new_width
         
-        # Headers
-        if stripped.startswith('# '):
-            flush_paragraph()
-            text = escape_html(stripped[2:])
-            if is_first_heading:
-                story.append(Paragraph(text, title_style))
-                is_first_heading = False
+        if words:
+            lines.append((' '.join(words), current))
+        return lines
+    
+    def wrap(self, availWidth, availHeight):
+        if self.paragraph is None and (self.lines is None or availWidth != self.wrap_width):
+            self.lines = self._break_lines(availWidth)
+            self.wrap_width = availWidth
+            if self.lines is None:
+                self.paragraph = Paragraph(self.text, self.style)
+        if self.paragraph is not None:
+            self.width, self.height = self.paragraph.wrap(availWidth, availHeight)
+            return self.width, self.height
+        self.width = availWidth
+        self.height = len(self.lines) * self.style.leading
+        return self.width, self.height
+    
+    def split(self, availWidth, availHeight):
+        self.wrap(availWidth, availHeight)
+        if self.paragraph is not None:
+            return self.paragraph.split(availWidth, availHeight)
+        # Same orphan/widow rules as Paragraph.split
+        fit = int(availHeight / self.style.leading)
+        if fit == 0 or (fit == 1 and not self.style.allowOrphans):
+            return []
+        if fit >= len(self.lines):
+            return [self]
+        if not self.style.allowWidows and len(self.lines) == fit + 1:
+            if len(self.lines) > 3 or (self.style.allowOrphans and len(self.lines) == 3):
+                fit -= 1
             else:
-                story.append(Paragraph(text, h1_style))
-        elif stripped.startswith('## '):
-            flush_paragraph()
-            text = escape_html(stripped[3:])
-            story.append(Paragraph(text, h2_style))
-        elif stripped.startswith('### '):
-            flush_paragraph()
-            text = escape_html(stripped[4:])
-            story.append(Paragraph(text, h3_style))
-        elif stripped.startswith('#### '):
-            flush_paragraph()
-            text = escape_html(stripped[5:])
-            story.append(Paragraph(text, h3_style))
+                return []
+        head, rest = self.lines[:fit], self.lines[fit:]
+        return [
+            _PlainText(' '.join(line for line, _ in head), self.style, head, availWidth),
+            _PlainText(' '.join(line for line, _ in rest), self.style, rest, availWidth)
+        ]
+    
+    def draw(self):
+        if self.paragraph is not None:
+            self.paragraph.drawOn(self.canv, 0, 0)
+            return
+        text = self.canv.beginText(0, self.height - self.style.fontSize)
+        text.setFont(self.style.fontName, self.style.fontSize, self.style.leading)
+        text.setFillColor(self.style.textColor)
+        for line, line_width in self.lines:
+            # Squeeze the spaces of lines that used the shrinkage allowance
+            spaces = line.count(' ')
+            overflow = line_width - self.width
+            text.setWordSpace(-overflow / spaces if overflow > 1e-8 and spaces else 0)
+            text.textLine(line)
+        self.canv.drawText(text)
+
+
+def _text_block(text: str, style: ParagraphStyle) -> Flowable:
+    """
+    Use the plain canvas flowable unless the text needs markup or alignment.
+    
+    Text with a no-break space also goes to Paragraph: _PlainText breaks on
+    str.split() whitespace, which Paragraph only does while no NBSP is present.
+    """
+    if style.alignment == TA_LEFT and '<' not in text and '&' not in text and '\xa0' not in text:
+        return _PlainText(text, style)
+    return Paragraph(text, style)
+
+
+def _add_blocks(story: list, blocks: list) -> None:
+    """Append (kind, markup) blocks to the story with their styles."""
+    for kind, text in blocks:
+        # Headers
+        if kind == _H1:
+            story.append(_text_block(text, _H1_STYLE))
+        elif kind == _H2:
+            story.append(_text_block(text, _H2_STYLE))
+        elif kind == _H3 or kind == _H4:
+            story.append(_text_block(text, _H3_STYLE))
         # List items
-        elif stripped.startswith('- ') or stripped.startswith('* '):
-            flush_paragraph()
-            text = escape_html(stripped[2:])
-            text = convert_inline_formatting(text)
-            story.append(Paragraph(f"• {text}", body_style))
-        elif re.match(r'^\d+\.\s', stripped):
-            flush_paragraph()
-            text = escape_html(stripped)
-            text = convert_inline_formatting(text)
-            story.append(Paragraph(text, body_style))
+        elif kind == _UL:
+            story.append(_text_block(f"• {text}", _BODY_STYLE))
+        elif kind == _OL:
+            story.append(_text_block(text, _BODY_STYLE))
         # Horizontal rule
-        elif stripped in ['---', '***', '___']:
-            flush_paragraph()
+        elif kind == _HR:
             story.append(Spacer(1, 12))
-        # Regular text
+        # Regular text (the parsers never emit blank paragraphs)
         else:
-            current_paragraph.append(stripped)
+            story.append(_text_block(text, _BODY_STYLE))
+
+
+def _render_pdf(markdown_content: str) -> bytes:
+    """Lay out the markdown content with ReportLab and return the PDF bytes."""
+    # Create PDF document (in memory; written out in one go by the caller)
+    buffer = io.BytesIO()
+    doc = SimpleDocTemplate(
+        buffer,
+        pagesize=letter,
+        rightMargin=72,
+        leftMargin=72,
+        topMargin=72,
+        bottomMargin=72
+    )
     
-    # Flush any remaining paragraph
-    flush_paragraph()
+    # Process markdown content; the first H1 becomes the title, so the
+    # blocks around it are added separately
+    blocks = _parse_markdown(markdown_content)
+    title_index = next((i for i, (kind, _) in enumerate(blocks) if kind == _H1), len(blocks))
+    
+    story = []
+    _add_blocks(story, blocks[:title_index])
+    if title_index < len(blocks):
+        story.append(Paragraph(blocks[title_index][1], _TITLE_STYLE))
+        _add_blocks(story, blocks[title_index + 1:])
     
     # Add some content if empty
     if not story:
-        story.append(Paragraph("No content generated.", body_style))
+        story.append(Paragraph("No content generated.", _BODY_STYLE))
     
     # Build PDF
     doc.build(story)
+    return buffer.getvalue()
+
+
+def _write_file(path: Path, data: bytes) -> None:
+    """Write data to path with as few write() syscalls as the kernel allows."""
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+    try:
+        view = memoryview(data)
+        while view:
+            view = view[os.write(fd, view):]
+    finally:
+        os.close(fd)
+
+
+def warmup() -> None:
+    """
+    Load ReportLab fonts and metrics (and compile the JIT classifier) up front.
+    
+    Call before forking worker processes so they inherit the loaded state
+    instead of paying for it on their first PDF.
+    """
+    _render_pdf(_WARMUP_MARKDOWN)
+    if NUMBA_AVAILABLE:
+        list(_parse_blocks_jit(_WARMUP_MARKDOWN))
+
+
+def _place_file(source: Path, output_path: Path) -> None:
+    """
+    Put a copy of source at output_path, atomically.
+    
+    Hardlinks when possible (cache and job directories usually share a
+    filesystem) and falls back to copying.
+    """
+    # rename() is a no-op between two links to the same file
+    if output_path.exists() and output_path.samefile(source):
+        return
+    tmp_path = output_path.with_name(f".{output_path.name}.{os.getpid()}.tmp")
+    tmp_path.unlink(missing_ok=True)
+    try:
+        os.link(source, tmp_path)
+    except OSError:
+        shutil.copyfile(source, tmp_path)
+    os.replace(tmp_path, output_path)
+
+
+def _pdf_cache_key(markdown_content: str) -> str:
+    """Cache key of a report: its content plus the renderer that drew it."""
+    h = hashlib.blake2b(digest_size=16)
+    h.update(f"{PDF_RENDER_VERSION}:{REPORTLAB_VERSION}\x00".encode('utf-8'))
+    h.update(markdown_content.encode('utf-8'))
+    return h.hexdigest()
+
+
+def _prune_pdf_cache() -> None:
+    """
+    Remove cached PDFs older than PDF_CACHE_MAX_AGE_SECONDS, then the
+    oldest ones until the cache fits PDF_CACHE_MAX_BYTES.
+    
+    Job directories keep their own links to the files, so only the cache
+    entries go. Temporary files of renders still in progress are left
+    alone unless they are past the age bound (left over from a crash).
+    """
+    now = time.time()
+    entries = []
+    for entry in os.scandir(PDF_CACHE_DIR):
+        try:
+            stat = entry.stat()
+        except FileNotFoundError:
+            continue
+        entries.append((stat.st_mtime, stat.st_size, entry.name, entry.path))
+    
+    total = 0
+    for mtime, size, name, path in sorted(entries, reverse=True):
+        expired = now - mtime > PDF_CACHE_MAX_AGE_SECONDS
+        if not name.startswith('.'):
+            total += size
+            expired = expired or total > PDF_CACHE_MAX_BYTES
+        if expired:
+            try:
+                os.unlink(path)
+            except FileNotFoundError:
+                pass
+
+
+def generate_pdf_report(markdown_content: str, output_path: str) -> None:
+    """
+    Generate a PDF report from markdown content.
+    
+    Uses ReportLab for PDF generation with simple styling.
+    Converts basic markdown formatting to PDF elements. Identical content
+    is only rendered once: PDFs are kept in PDF_CACHE_DIR by content hash
+    (and renderer version), within an age and a size bound.
+    
+    Args:
+        markdown_content: The markdown report content
+        output_path: Path where the PDF should be saved
+    """
+    key = _pdf_cache_key(markdown_content)
+    cached_path = PDF_CACHE_DIR / f"{key}.pdf"
+    
+    if cached_path.exists():
+        try:
+            _place_file(cached_path, Path(output_path))
+            print(f"  PDF served from cache ({key[:12]})")
+            return
+        except FileNotFoundError:
+            # Evicted by another process in the meantime
+            pass
+    
+    # Render to a temporary name so a half-written PDF is never cached
+    PDF_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    tmp_path = PDF_CACHE_DIR / f".{key}.{os.getpid()}.tmp"
+    _write_file(tmp_path, _render_pdf(markdown_content))
+    os.replace(tmp_path, cached_path)
+    _place_file(cached_path, Path(output_path))
+    _prune_pdf_cache()
+
+
+def _get_pdf_executor() -> ProcessPoolExecutor:
+    """Get the shared PDF rendering process pool (created on first use)."""
+    global _pdf_executor
+    with _pdf_executor_lock:
+        if _pdf_executor is None:
+            _pdf_executor = ProcessPoolExecutor(max_workers=PDF_WORKERS)
+        return _pdf_executor
+
+
+def generate_pdf_report_async(markdown_content: str, output_path: str) -> Future:
+    """
+    Generate a PDF report in the PDF_WORKERS process pool.
+    
+    Rendering is CPU-bound pure Python, so it runs in separate processes
+    instead of holding the GIL of the caller; several reports render in
+    parallel. The pool is created on first use, after any worker fork,
+    and lives until shutdown_pdf_executor(), so only use this from
+    long-lived processes.
+    
+    Args:
+        markdown_content: The markdown report content
+        output_path: Path where the PDF should be saved
+    
+    Returns:
+        Future that completes once the PDF is written (see generate_pdf_report)
+    """
+    return _get_pdf_executor().submit(generate_pdf_report, markdown_content, output_path)
+
 
+def shutdown_pdf_executor() -> None:
+    """Stop the PDF rendering processes, if they were started."""
+    global _pdf_executor
+    with _pdf_executor_lock:
+        if _pdf_executor is not None:
+            _pdf_executor.shutdown()
+            _pdf_executor = None
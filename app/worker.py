@@ -4,27 +4,153 @@ Run with: python -m app.worker
 """
 
 import os
-from redis import Redis
-from rq import Worker, Queue, Connection
+import signal
+import time
+import traceback
+from redis import Redis, ConnectionPool
+from rq import Worker, SimpleWorker, Queue, Connection
+
+from app.queue import USE_SIMPLE_WORKER
+from app.utils_files import warmup as warmup_pdf, shutdown_pdf_executor
 
 # Redis connection configuration
 REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379")
+# Number of worker processes forked by run_worker (one job each at a time);
+# defaults to the CPUs this process may run on, not every CPU of the host
+_USABLE_CPUS = len(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else os.cpu_count() or 1
+WORKER_CONCURRENCY = int(os.getenv("WORKER_CONCURRENCY", str(_USABLE_CPUS)))
+# Connections kept per worker process (heartbeats, dequeues, job updates)
+REDIS_POOL_SIZE = int(os.getenv("REDIS_POOL_SIZE", "32"))
+# Seconds: a worker that exits sooner than this after being forked is only
+# restarted after waiting as long
+RESPAWN_MIN_UPTIME = 5
+# Seconds between heartbeats of a running job
+JOB_MONITORING_INTERVAL = int(os.getenv("JOB_MONITORING_INTERVAL", "30"))
 
-def run_worker():
-    """Start the RQ worker to process jobs."""
-    redis_conn = Redis.from_url(REDIS_URL)
+
+def _work(index: int):
+    """
+    Run one RQ worker until it shuts down.
     
-    # Listen on the tasks queue
+    Args:
+        index: Position in the worker pool; only worker 0 runs the scheduler
+    """
+    # Each process opens its own pool (sockets must not cross a fork).
+    # RQ works on raw bytes, so replies are never decoded in Python; redis-py
+    # parses them with hiredis on its own when it is installed.
+    pool = ConnectionPool.from_url(
+        REDIS_URL,
+        max_connections=REDIS_POOL_SIZE,
+        socket_keepalive=True,
+        decode_responses=False
+    )
+    redis_conn = Redis(connection_pool=pool)
     queues = [Queue("tasks", connection=redis_conn)]
     
+    if USE_SIMPLE_WORKER:
+        # Jobs run in this process, so pay DNS + TLS setup before the first one
+        from app.tasks import warmup_connections
+        warmup_connections()
+    
+    worker_class = SimpleWorker if USE_SIMPLE_WORKER else Worker
+    worker = worker_class(
+        queues,
+        connection=redis_conn,
+        job_monitoring_interval=JOB_MONITORING_INTERVAL
+    )
+    try:
+        worker.work(with_scheduler=(index == 0))
+    finally:
+        # Worker processes leave through os._exit, which skips the pool's
+        # own exit handler
+        shutdown_pdf_executor()
+
+
+def run_worker():
+    """Start the RQ workers to process jobs."""
     print("Starting worker...")
     print(f"Connected to Redis at {REDIS_URL}")
     print("Listening on queue: tasks")
     
-    worker = Worker(queues, connection=redis_conn)
-    worker.work(with_scheduler=True)
-
+    # Load fonts and compile the PDF helpers once, before forking, so no
+    # worker pays for it on its first job
+    warmup_pdf()
+    
+    if WORKER_CONCURRENCY <= 1:
+        _work(0)
+        return
+    
+    print(f"Forking {WORKER_CONCURRENCY} worker processes")
+    children = {}  # pid -> pool index
+    started = {}  # pool index -> fork time
+    stopping = False
+    
+    # Pass shutdown requests on to the pool (Ctrl+C already reaches the
+    # whole process group, and a second SIGINT would force a cold shutdown).
+    # Installed before forking so a SIGTERM during startup stops the
+    # children started so far instead of orphaning them.
+    def forward_signal(signum, frame):
+        nonlocal stopping
+        stopping = True
+        for pid in list(children):
+            try:
+                os.kill(pid, signum)
+            except ProcessLookupError:
+                pass
+    
+    def spawn(index: int) -> bool:
+        """Fork the worker at index; False once shutting down."""
+        # Held back while forking, so no child is missed by forward_signal
+        signal.pthread_sigmask(signal.SIG_BLOCK, {signal.SIGTERM})
+        try:
+            if stopping:
+                return False
+            pid = os.fork()
+            if pid == 0:
+                # The child starts with the default handlers (RQ installs its own)
+                signal.signal(signal.SIGTERM, signal.SIG_DFL)
+                signal.signal(signal.SIGINT, signal.default_int_handler)
+                signal.pthread_sigmask(signal.SIG_UNBLOCK, {signal.SIGTERM})
+                status = 0
+                try:
+                    _work(index)
+                except BaseException:
+                    traceback.print_exc()
+                    status = 1
+                os._exit(status)
+            children[pid] = index
+            started[index] = time.monotonic()
+            return True
+        finally:
+            signal.pthread_sigmask(signal.SIG_UNBLOCK, {signal.SIGTERM})
+    
+    signal.signal(signal.SIGTERM, forward_signal)
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    
+    for index in range(WORKER_CONCURRENCY):
+        if not spawn(index):
+            break
+    
+    # A worker that dies outside a shutdown (crash, OOM kill, a signal sent
+    # to it alone) is replaced at the same index, so the pool keeps its size
+    # and index 0 keeps the scheduler
+    while children:
+        try:
+            pid, status = os.wait()
+        except ChildProcessError:
+            break
+        index = children.pop(pid, None)
+        if index is None:
+            continue
+        if status != 0:
+            print(f"Worker process {pid} exited with status {status}")
+        if stopping:
+            continue
+        # Back off when workers die right after starting (e.g. Redis down)
+        if time.monotonic() - started[index] < RESPAWN_MIN_UPTIME:
+            time.sleep(RESPAWN_MIN_UPTIME)
+        print(f"Restarting worker {index}")
+        spawn(index)
 
 if __name__ == "__main__":
     run_worker()
-
@@ -0,0 +1,17 @@
+"""
+Build script for the optional compiled markdown parser.
+
+Build in place with: python setup.py build_ext --inplace
+Without it, app.utils_files uses its pure-Python parser.
+"""
+
+from setuptools import setup, Extension
+from Cython.Build import cythonize
+
+setup(
+    name="agentic-app-extensions",
+    ext_modules=cythonize(
+        [Extension("app._md_parser", ["app/_md_parser.pyx"])],
+        compiler_directives={"language_level": 3}
+    ),
+)
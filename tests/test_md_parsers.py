@@ -0,0 +1,105 @@
+"""
+The optional markdown parser backends must produce exactly the blocks of
+the regex parser they replace.
+
+Run with: python -m pytest tests
+Backends that are not available here (Numba not installed, compiled
+parser not built) are skipped.
+"""
+
+import random
+
+import pytest
+
+from app import utils_files
+
+
+requires_numba = pytest.mark.skipif(not utils_files.NUMBA_AVAILABLE, reason="numba not installed")
+requires_compiled = pytest.mark.skipif(
+    not utils_files.CYTHON_PARSER_AVAILABLE,
+    reason="compiled parser not built (python setup.py build_ext --inplace)"
+)
+
+# Each case exercises one rule of _BLOCK_CLASSIFIER or the inline converter
+CORPUS = [
+    # Headers: one to four '#', then a space and text
+    "# One\n## Two\n### Three\n#### Four\n##### Five\n",
+    "#NoSpace\n# \n#  spaced  \n#\ttab\n",
+    # List markers
+    "- dash item\n* star item\n+ plus item\n-no space\n- \n*  two spaces\n",
+    # Numbered lists: digits, '.', whitespace, text
+    "1. first\n10. tenth\n1.no space\n1 . gap\n1.\ttab\n2.\n123456789. long\n.5 not\n",
+    # Horizontal rule variants
+    "---\n***\n___\n----\n--\n- - -\n  ---  \n___ x\n",
+    # Nested and unbalanced emphasis
+    "***bold italic*** and **bold *inner* text** and _u **b** u_\n",
+    "a*b**c***d_e__f___g\n\n**unclosed and *half\n\n_**mixed_**\n",
+    # Characters that need escaping
+    "Tom & Jerry <b>not a tag</b> 1 < 2 > 0 &amp;\n",
+    "# A & B <c>\n- x < y\n1. a & b\n",
+    # Non-ASCII and Unicode whitespace
+    "café naïve 日本語\n\nno\u00a0break\u00a0space\n",
+    "\u00a0# nbsp header\n\u2003- em space item\n\u30001. ideographic\n",
+    "# title\u00a0\n-\u00a0nbsp marker\n1.\u00a0nbsp after dot\n\u0661. arabic digit\n",
+    "---\u00a0\n\u00a0***\n\u2028\n",
+    # Line endings and blank runs
+    "# CRLF\r\nbody line\r\n\r\n- item\r\n1. one\r\n---\r\n",
+    "para one\nstill one\n\n\n\npara two\n \t \npara three\n",
+    "\n\n\n",
+    "",
+    "no trailing newline",
+]
+
+_FRAGMENTS = [
+    "# H", "## H2", "#### H4", "##### H5", "- li", "* li", "-x", "1. ol", "12. ol",
+    "1.x", "---", "***", "___", "----", "**b**", "*i*", "_u_", "***bi***",
+    "a & b", "<x>", "\u00a0", "\u2003", "\r", "\t", "café", "\u0661. x", "",
+    "  ", "text", "more text",
+]
+
+
+def _fuzz_corpus(count: int = 200, seed: int = 0) -> list[str]:
+    """Random documents assembled from the fragments above."""
+    rng = random.Random(seed)
+    docs = []
+    for _ in range(count):
+        lines = []
+        for _ in range(rng.randint(1, 30)):
+            line = " ".join(rng.choice(_FRAGMENTS) for _ in range(rng.randint(1, 4)))
+            lines.append(rng.choice(["", " ", "\t", "\u00a0"]) + line + rng.choice(["", " ", "\r"]))
+        docs.append("\n".join(lines))
+    return docs
+
+
+DOCUMENTS = CORPUS + _fuzz_corpus()
+
+
+@requires_numba
+@pytest.mark.parametrize("markdown", DOCUMENTS)
+def test_jit_parser_matches_regex(markdown):
+    assert list(utils_files._parse_blocks_jit(markdown)) == list(utils_files._parse_blocks_regex(markdown))
+
+
+@requires_numba
+@pytest.mark.parametrize("line", [
+    # '#' count limit
+    "# a", "#### a", "##### a", "#a", "# ",
+    # '- ' / '* ' markers
+    "- a", "* a", "-a", "*a", "- ", "+ a",
+    # Rules
+    "---", "***", "___", "-- -", "____", "***a",
+    # Digits, then '.', then whitespace
+    "1. a", "99. a", "1.a", "1 . a", "1.\ta", "1.", "a1. a",
+])
+def test_jit_classifier_matches_regex_per_line(line):
+    for variant in (line, f"  {line}  ", f"{line}\r", f"\u00a0{line}\u00a0"):
+        markdown = f"before\n\n{variant}\n\nafter"
+        assert list(utils_files._parse_blocks_jit(markdown)) == list(utils_files._parse_blocks_regex(markdown))
+
+
+@requires_compiled
+@pytest.mark.parametrize("markdown", DOCUMENTS)
+def test_compiled_parser_matches_python(markdown, monkeypatch):
+    # Keep the reference on the regex pass whatever the document size
+    monkeypatch.setattr(utils_files, "NUMBA_AVAILABLE", False)
+    assert utils_files._compiled_parse_markdown(markdown) == utils_files._markup_blocks(markdown)